@@ -1,19 +1,32 @@
 import chess
+import chess.engine
 import pygame
 import pygame.gfxdraw
+import queue
 import threading
-import time
+from collections import OrderedDict
 from typing import Optional, Dict, List, Tuple
 from config import *
-try:
-    from stockfish import Stockfish
-    STOCKFISH_AVAILABLE = True
-except ImportError:
-    STOCKFISH_AVAILABLE = False
-    print("Warning: stockfish library not installed. Run: pip install stockfish")
-from eval import evaluate_board
 
 class ChessPredictor:
+    MODE_LABELS = {
+        SETUP_MODE: "Setup",
+        ANALYSIS_MODE: "Analysis",
+        PLAY_MODE: "Play"
+    }
+    CASTLING_OPTIONS = [
+        ('white_kingside', 'White kingside', 170),
+        ('white_queenside', 'White queenside', 190),
+        ('black_kingside', 'Black kingside', 210),
+        ('black_queenside', 'Black queenside', 230)
+    ]
+    # One multipv search covers both the AI pick (10th best) and the top-5 comparison
+    ENGINE_DEPTH = 8
+    ENGINE_MULTIPV = 12
+    ANALYSIS_CACHE_SIZE = 100_000
+    # Board attribute holding each piece type's bitboard
+    PIECE_BITBOARDS = (None, 'pawns', 'knights', 'bishops', 'rooks', 'queens', 'kings')
+    
     def __init__(self, use_svg=True, stockfish_path=None):
         print("Starting ChessPredictor initialization...")
         
@@ -24,7 +37,13 @@ class ChessPredictor:
             print("✓ Pygame initialized")
             
             print("2. Creating display...")
-            self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+            try:
+                # Accelerated renderer path; vsync paces flips to the display
+                self.screen = pygame.display.set_mode(
+                    (WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SCALED | pygame.DOUBLEBUF, vsync=1)
+            except pygame.error as e:
+                print(f"   - Accelerated display unavailable ({e}), using software surface")
+                self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
             pygame.display.set_caption("ChessPredictor-Proto v1.0")
             print("✓ Display created")
             
@@ -33,6 +52,9 @@ class ChessPredictor:
             self.font_large = pygame.font.Font(None, 24)
             self.font_medium = pygame.font.Font(None, 20)
             self.font_small = pygame.font.Font(None, 16)
+            # Rendered text surfaces keyed by (text, font, color)
+            self._text_cache = {}
+            self._build_label_positions()
             print("✓ Fonts initialized")
             
             print("4. Validating piece files...")
@@ -54,6 +76,31 @@ class ChessPredictor:
             self.selected_piece = None
             self.dragging = False
             self.valid_moves = set()
+            # Legal moves of the position identified by _legal_key
+            self._legal_key = None
+            self._legal_moves = frozenset()
+            self._moves_by_from = {}
+            # Screen position of each square's top-left corner and center
+            self._square_topleft = [None] * 64
+            self._square_center = [None] * 64
+            for square in chess.SQUARES:
+                x = BOARD_OFFSET_X + chess.square_file(square) * SQUARE_SIZE
+                y = BOARD_OFFSET_Y + (7 - chess.square_rank(square)) * SQUARE_SIZE
+                self._square_topleft[square] = (x, y)
+                self._square_center[square] = (x + SQUARE_SIZE // 2, y + SQUARE_SIZE // 2)
+            # Blit position that centers a piece sprite in each square
+            offset = SQUARE_SIZE // 2 - PIECE_SIZE // 2 + PIECE_OFFSET + 10
+            self._piece_topleft = [
+                (x + offset, y + offset)
+                for x, y in self._square_topleft
+            ]
+            self._square_rects = [
+                pygame.Rect(topleft, (SQUARE_SIZE, SQUARE_SIZE))
+                for topleft in self._square_topleft
+            ]
+            self._board_surface = pygame.Surface((BOARD_SIZE, BOARD_SIZE)).convert()
+            self._build_board_surface()
+            self._build_move_dot()
             print("✓ Game state initialized")
             
             print("7. Setting up game modes...")
@@ -71,8 +118,9 @@ class ChessPredictor:
             
             print("8. Initializing AI variables...")
             # AI and analysis
-            self.stockfish_ai = None
             self.ai_thinking = False
+            self._ai_request_id = 0  # Results of older AI requests are dropped
+            self._pending_ai_move = None  # (position key, move) for the main loop to play
             self.last_ai_move = None
             self.last_ai_eval = None
             self.stockfish_comparison = None
@@ -83,54 +131,34 @@ class ChessPredictor:
             # UI state
             self.buttons = {}
             self.create_ui_elements()
+            # Static control panel pixels are drawn once and blitted per frame
+            self._panel_bg = pygame.Surface((CONTROL_PANEL_WIDTH, WINDOW_HEIGHT)).convert()
+            self._build_panel_bg()
+            self._panel_rect = pygame.Rect(CONTROL_PANEL_X, 0, CONTROL_PANEL_WIDTH, WINDOW_HEIGHT)
+            # Redraw only when state changes; None rects means flip the whole window
+            self._dirty = True
+            self._dirty_rects = None
+            self._dirty_lock = threading.Lock()
             print("✓ UI elements created")
                 
             print("10. Initializing game history...")
             # Game history
             self.move_history = []
-            self.position_history = []
             print("✓ Game history initialized")
                 
-            print("11. Initializing Stockfish (this may take a moment)...")
-            # Initialize Stockfish using library approach (no direct .exe calls)
-            try:
-                print("   - Checking if stockfish library is available...")
-                if not STOCKFISH_AVAILABLE:
-                    print("   - ✗ stockfish library not installed")
-                    print("   - Run: pip install stockfish")
-                    self.stockfish_ai = None
-                else:
-                    print("   - ✓ stockfish library available")
-                    
-                    print("   - Creating Stockfish instance using library...")
-                    # The library handles the exe internally - we just pass the path
-                    self.stockfish_ai = Stockfish(path=stockfish_path or "stockfish.exe")
-                    print("   - ✓ Stockfish instance created")
-                    
-                    print("   - Setting parameters...")
-                    self.stockfish_ai.set_depth(10)
-                    self.stockfish_ai.set_skill_level(15)
-                    print("   - ✓ Parameters set")
-                    
-                    print("   - Testing basic functionality...")
-                    test_board = chess.Board()
-                    self.stockfish_ai.set_fen_position(test_board.fen())
-                    
-                    evaluation = self.stockfish_ai.get_evaluation()
-                    print(f"   - ✓ Evaluation: {evaluation}")
-                    
-                    top_moves = self.stockfish_ai.get_top_moves(3)
-                    if top_moves:
-                        print(f"   - ✓ Top move: {top_moves[0]['Move']}")
-                        print("   - ✅ Stockfish working!")
-                    else:
-                        print("   - ⚠️  No moves returned")
-                        
-            except Exception as e:
-                print(f"   - ✗ Stockfish failed: {e}")
-                self.stockfish_ai = None
-            
-            print("✓ Stockfish initialization completed")
+            print("11. Starting Stockfish in the background...")
+            # A single persistent engine process fed by one worker thread
+            self.engine = None
+            self._engine_ready = threading.Event()
+            self._engine_q = queue.Queue()
+            # Held for the duration of every engine call, including shutdown
+            self._engine_lock = threading.Lock()
+            # LRU of formatted top moves keyed by the position's transposition key;
+            # kept across board resets so repeated positions skip the engine
+            self._analysis_cache = OrderedDict()
+            self._analysis_lock = threading.Lock()
+            threading.Thread(target=self._init_engine, args=(stockfish_path,), daemon=True).start()
+            print("✓ Stockfish initialization started")
             print("✅ ChessPredictor initialization successful!")
                 
         except Exception as e:
@@ -148,13 +176,21 @@ class ChessPredictor:
                 try:
                     path = get_piece_path(f"{color}{piece}", use_svg)
                     img = pygame.image.load(path)
+                    # Match the display pixel format so blits take the fast path
                     self.pieces[f"{color}{piece}"] = pygame.transform.smoothscale(
                         img, (PIECE_SIZE, PIECE_SIZE)
-                    )
+                    ).convert_alpha(self.screen)
                 except pygame.error as e:
                     print(f"Error loading piece {color}{piece}: {e}")
                     pygame.quit()
                     exit(1)
+        
+        # Sprites indexed by piece_type + 6 * color for the draw loops
+        self._piece_surf = [None] * 13
+        for piece_type in chess.PIECE_TYPES:
+            for color in chess.COLORS:
+                key = ('w' if color else 'b') + chess.piece_symbol(piece_type).upper()
+                self._piece_surf[piece_type + 6 * color] = self.pieces[key]
     
     def create_ui_elements(self):
         """Create UI buttons and controls"""
@@ -181,25 +217,58 @@ class ChessPredictor:
             'toggle_vs_ai': pygame.Rect(CONTROL_PANEL_X + 10, 300, 100, 25),
         }
     
-    def draw_board(self):
-        """Draw the chess board with file/rank labels"""
-        # Draw file labels (a-h) at bottom
-        files = ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h']
-        for i, file_label in enumerate(files):
+    def _text(self, text, font, color):
+        """Return a cached rendered text surface"""
+        key = (text, id(font), color)
+        surf = self._text_cache.get(key)
+        if surf is None:
+            if len(self._text_cache) > 512:
+                self._text_cache.clear()  # Keep dynamic status strings bounded
+            surf = font.render(text, True, color).convert_alpha()
+            self._text_cache[key] = surf
+        return surf
+    
+    def _build_label_positions(self):
+        """Pre-render file/rank labels and their blit rectangles"""
+        # File labels (a-h) at bottom
+        self._file_label_positions = []
+        for i, file_label in enumerate(chess.FILE_NAMES):
             x = BOARD_OFFSET_X + i * SQUARE_SIZE + SQUARE_SIZE // 2
             y = BOARD_OFFSET_Y + BOARD_SIZE + 10
-            label = self.font_medium.render(file_label, True, LABEL_COLOR)
-            label_rect = label.get_rect(center=(x, y))
-            self.screen.blit(label, label_rect)
+            label = self._text(file_label, self.font_medium, LABEL_COLOR)
+            self._file_label_positions.append((label, label.get_rect(center=(x, y))))
         
-        # Draw rank labels (1-8) on left side
-        ranks = ['1', '2', '3', '4', '5', '6', '7', '8']
-        for i, rank_label in enumerate(ranks):
+        # Rank labels (1-8) on left side
+        self._rank_label_positions = []
+        for i, rank_label in enumerate(chess.RANK_NAMES):
             x = BOARD_OFFSET_X - 20
             y = BOARD_OFFSET_Y + (7 - i) * SQUARE_SIZE + SQUARE_SIZE // 2
-            label = self.font_medium.render(rank_label, True, LABEL_COLOR)
-            label_rect = label.get_rect(center=(x, y))
-            self.screen.blit(label, label_rect)
+            label = self._text(rank_label, self.font_medium, LABEL_COLOR)
+            self._rank_label_positions.append((label, label.get_rect(center=(x, y))))
+    
+    def _build_board_surface(self):
+        """Render the empty checkered board into self._board_surface"""
+        for row in range(8):
+            for col in range(8):
+                color = LIGHT_SQUARE if (row + col) % 2 == 0 else DARK_SQUARE
+                self._board_surface.fill(
+                    color, (col * SQUARE_SIZE, row * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
+    
+    def _build_move_dot(self):
+        """Render the legal-move dot once into self._move_dot"""
+        radius = SQUARE_SIZE // 6
+        dot = pygame.Surface((2 * radius + 1, 2 * radius + 1), pygame.SRCALPHA)
+        pygame.draw.circle(dot, (0, 255, 0, 150), (radius, radius), radius)  # Larger green dots, written without blending
+        pygame.gfxdraw.aacircle(dot, radius, radius, radius, (0, 200, 0))  # Green border
+        self._move_dot = dot.convert_alpha()
+        self._move_dot_radius = radius
+    
+    def draw_board(self):
+        """Draw the chess board with file/rank labels"""
+        for surf, rect in self._file_label_positions:
+            self.screen.blit(surf, rect)
+        for surf, rect in self._rank_label_positions:
+            self.screen.blit(surf, rect)
         
         # Draw board border
         border_rect = pygame.Rect(BOARD_OFFSET_X - 2, BOARD_OFFSET_Y - 2, 
@@ -207,194 +276,171 @@ class ChessPredictor:
         pygame.draw.rect(self.screen, BOARD_BORDER, border_rect, 3)
         
         # Draw squares
-        for row in range(8):
-            for col in range(8):
-                square = chess.square(col, 7 - row)
-                color = LIGHT_SQUARE if (row + col) % 2 == 0 else DARK_SQUARE
-                
-                # Highlight selected piece
-                if self.selected_piece == square:
-                    color = (255, 255, 0, 100)  # Yellow highlight for selected piece
-                
-                # Highlight AI suggested move
-                if self.ai_suggested_square == square:
-                    color = (0, 255, 0, 100)  # Green highlight for AI suggestion
-                
-                x = BOARD_OFFSET_X + col * SQUARE_SIZE
-                y = BOARD_OFFSET_Y + row * SQUARE_SIZE
-                pygame.draw.rect(self.screen, color, 
-                               (x, y, SQUARE_SIZE, SQUARE_SIZE))
+        self.screen.blit(self._board_surface, (BOARD_OFFSET_X, BOARD_OFFSET_Y))
+        
+        # Highlight selected piece
+        if self.selected_piece is not None:
+            self.screen.fill((255, 255, 0), self._square_rects[self.selected_piece])
+        
+        # Highlight AI suggested move
+        if self.ai_suggested_square is not None:
+            self.screen.fill((0, 255, 0), self._square_rects[self.ai_suggested_square])
         
         # Draw valid move dots (larger and more visible)
         if self.selected_piece and self.current_mode != SETUP_MODE:
-            for move in self.valid_moves:
-                center_x = BOARD_OFFSET_X + (chess.square_file(move) * SQUARE_SIZE) + SQUARE_SIZE // 2
-                center_y = BOARD_OFFSET_Y + (7 - chess.square_rank(move)) * SQUARE_SIZE + SQUARE_SIZE // 2
-                # Draw larger, more visible dots for legal moves
-                pygame.gfxdraw.filled_circle(
-                    self.screen, center_x, center_y, 
-                    SQUARE_SIZE // 6, (0, 255, 0, 150)  # Larger green dots
-                )
-                pygame.gfxdraw.aacircle(
-                    self.screen, center_x, center_y, 
-                    SQUARE_SIZE // 6, (0, 200, 0)  # Green border
-                )
+            r = self._move_dot_radius
+            self.screen.blits(
+                [(self._move_dot, (cx - r, cy - r))
+                 for cx, cy in (self._square_center[move] for move in self.valid_moves)],
+                doreturn=False
+            )
     
     def draw_pieces(self):
         """Draw chess pieces properly centered in squares"""
-        for square in chess.SQUARES:
-            piece = self.board.piece_at(square)
-            if piece:
-                color = 'w' if piece.color else 'b'
-                piece_key = f"{color}{piece.symbol().upper()}"
-                
-                # Calculate center position of the square
-                square_center_x = BOARD_OFFSET_X + chess.square_file(square) * SQUARE_SIZE + SQUARE_SIZE // 2
-                square_center_y = BOARD_OFFSET_Y + (7 - chess.square_rank(square)) * SQUARE_SIZE + SQUARE_SIZE // 2
-                
-                # Position piece centered in the square
-                piece_x = square_center_x - PIECE_SIZE // 2 + PIECE_OFFSET + 10
-                piece_y = square_center_y - PIECE_SIZE // 2 + PIECE_OFFSET + 10
-
-                # Don't draw the piece being dragged
-                if self.dragging and self.selected_piece == square:
-                    continue
-                    
-                self.screen.blit(self.pieces[piece_key], (piece_x, piece_y))
+        dragged = self.selected_piece if self.dragging else None
+        
+        blits = []
+        for square, piece in self.board.piece_map().items():
+            # Don't draw the piece being dragged
+            if square == dragged:
+                continue
+            
+            surf = self._piece_surf[piece.piece_type + 6 * piece.color]
+            blits.append((surf, self._piece_topleft[square]))
+        
+        self.screen.blits(blits, doreturn=False)
     
-    def draw_control_panel(self):
-        """Draw the control panel"""
-        # Background
-        pygame.draw.rect(self.screen, PANEL_BACKGROUND, 
-                        (CONTROL_PANEL_X, 0, CONTROL_PANEL_WIDTH, WINDOW_HEIGHT))
+    def _build_panel_bg(self):
+        """Render the immutable parts of the control panel into self._panel_bg"""
+        panel = self._panel_bg
+        ox = -CONTROL_PANEL_X  # Panel surface is offset from screen coordinates
+        panel.fill(PANEL_BACKGROUND)
         
         # Title
-        title = self.font_large.render("ChessPredictor v1.0", True, TEXT_COLOR)
-        self.screen.blit(title, (CONTROL_PANEL_X + 10, 10))
+        title = self._text("ChessPredictor v1.0", self.font_large, TEXT_COLOR)
+        panel.blit(title, (10, 10))
         
         # Mode selection with clear borders
         y_offset = 40
-        mode_text = self.font_small.render("Mode:", True, TEXT_COLOR)
-        self.screen.blit(mode_text, (CONTROL_PANEL_X + 10, y_offset - 15))
-        
-        modes = [SETUP_MODE, ANALYSIS_MODE, PLAY_MODE]
-        mode_labels = ["Setup", "Analysis", "Play"]
+        mode_text = self._text("Mode:", self.font_small, TEXT_COLOR)
+        panel.blit(mode_text, (10, y_offset - 15))
         
-        for i, (mode, label) in enumerate(zip(modes, mode_labels)):
-            btn_rect = self.buttons[f'{mode}_mode']
-            color = BUTTON_ACTIVE if self.current_mode == mode else BUTTON_COLOR
-            pygame.draw.rect(self.screen, color, btn_rect)
-            pygame.draw.rect(self.screen, TEXT_COLOR, btn_rect, 2)
+        for mode, label in self.MODE_LABELS.items():
+            btn_rect = self.buttons[f'{mode}_mode'].move(ox, 0)
+            pygame.draw.rect(panel, BUTTON_COLOR, btn_rect)
+            pygame.draw.rect(panel, TEXT_COLOR, btn_rect, 2)
             
-            text = self.font_small.render(label, True, TEXT_COLOR)
-            text_rect = text.get_rect(center=btn_rect.center)
-            self.screen.blit(text, text_rect)
-        
-        # Current mode indicator
-        mode_indicator = self.font_small.render(f"Current: {self.current_mode.title()}", True, (0, 100, 0))
-        self.screen.blit(mode_indicator, (CONTROL_PANEL_X + 10, y_offset + 30))
+            text = self._text(label, self.font_small, TEXT_COLOR)
+            panel.blit(text, text.get_rect(center=btn_rect.center))
         
         # Active color
         y_offset = 100
-        color_text = self.font_small.render("Active Color:", True, TEXT_COLOR)
-        self.screen.blit(color_text, (CONTROL_PANEL_X + 10, y_offset - 15))
-        
-        # White to move radio button
-        pygame.draw.circle(self.screen, (255, 255, 255), 
-                         (CONTROL_PANEL_X + 34, y_offset + 7), 8)
-        pygame.draw.circle(self.screen, TEXT_COLOR, 
-                         (CONTROL_PANEL_X + 34, y_offset + 7), 8, 2)
-        if self.active_color == chess.WHITE:
-            pygame.draw.circle(self.screen, TEXT_COLOR, 
-                             (CONTROL_PANEL_X + 34, y_offset + 7), 4)
-        
-        white_text = self.font_small.render("White to move", True, TEXT_COLOR)
-        self.screen.blit(white_text, (CONTROL_PANEL_X + 50, y_offset))
-        
-        # Black to move radio button
-        pygame.draw.circle(self.screen, (255, 255, 255), 
-                         (CONTROL_PANEL_X + 34, y_offset + 32), 8)
-        pygame.draw.circle(self.screen, TEXT_COLOR, 
-                         (CONTROL_PANEL_X + 34, y_offset + 32), 8, 2)
-        if self.active_color == chess.BLACK:
-            pygame.draw.circle(self.screen, TEXT_COLOR, 
-                             (CONTROL_PANEL_X + 34, y_offset + 32), 4)
-        
-        black_text = self.font_small.render("Black to move", True, TEXT_COLOR)
-        self.screen.blit(black_text, (CONTROL_PANEL_X + 50, y_offset + 25))
+        color_text = self._text("Active Color:", self.font_small, TEXT_COLOR)
+        panel.blit(color_text, (10, y_offset - 15))
+        
+        # Radio button outlines for white and black to move
+        for dy, label in ((0, "White to move"), (25, "Black to move")):
+            pygame.draw.circle(panel, (255, 255, 255), (34, y_offset + 7 + dy), 8)
+            pygame.draw.circle(panel, TEXT_COLOR, (34, y_offset + 7 + dy), 8, 2)
+            text = self._text(label, self.font_small, TEXT_COLOR)
+            panel.blit(text, (50, y_offset + dy))
         
         # Castling availability
         y_offset = 170
-        castling_text = self.font_small.render("Castling Rights:", True, TEXT_COLOR)
-        self.screen.blit(castling_text, (CONTROL_PANEL_X + 10, y_offset - 15))
-        
-        castling_options = [
-            ('white_kingside', 'White kingside', 170),
-            ('white_queenside', 'White queenside', 190),
-            ('black_kingside', 'Black kingside', 210),
-            ('black_queenside', 'Black queenside', 230)
-        ]
+        castling_text = self._text("Castling Rights:", self.font_small, TEXT_COLOR)
+        panel.blit(castling_text, (10, y_offset - 15))
         
-        for key, label, y_pos in castling_options:
+        for key, label, y_pos in self.CASTLING_OPTIONS:
             # Checkbox
-            checkbox_rect = pygame.Rect(CONTROL_PANEL_X + 20, y_pos, 15, 15)
-            pygame.draw.rect(self.screen, (255, 255, 255), checkbox_rect)
-            pygame.draw.rect(self.screen, TEXT_COLOR, checkbox_rect, 2)
-            
-            if self.castling_rights[key]:
-                pygame.draw.line(self.screen, TEXT_COLOR,
-                               (CONTROL_PANEL_X + 23, y_pos + 7),
-                               (CONTROL_PANEL_X + 27, y_pos + 11), 2)
-                pygame.draw.line(self.screen, TEXT_COLOR,
-                               (CONTROL_PANEL_X + 27, y_pos + 11),
-                               (CONTROL_PANEL_X + 32, y_pos + 4), 2)
+            checkbox_rect = pygame.Rect(20, y_pos, 15, 15)
+            pygame.draw.rect(panel, (255, 255, 255), checkbox_rect)
+            pygame.draw.rect(panel, TEXT_COLOR, checkbox_rect, 2)
             
-            text = self.font_small.render(label, True, TEXT_COLOR)
-            self.screen.blit(text, (CONTROL_PANEL_X + 40, y_pos))
+            text = self._text(label, self.font_small, TEXT_COLOR)
+            panel.blit(text, (40, y_pos))
         
-        # Action buttons with better spacing
-        y_offset = 270
+        # Action buttons (the VS AI label changes, so only its frame is static)
         buttons_info = [
             ('clear_board', 'Clear Board'),
             ('reset_position', 'Reset'),
             ('get_best_move', 'Best Move'),
-            ('toggle_vs_ai', 'VS AI: ' + ('ON' if self.play_vs_ai else 'OFF'))
+            ('toggle_vs_ai', None)
         ]
         
-        for i, (key, label) in enumerate(buttons_info):
-            btn_rect = self.buttons[key]
-            pygame.draw.rect(self.screen, BUTTON_COLOR, btn_rect)
-            pygame.draw.rect(self.screen, TEXT_COLOR, btn_rect, 2)
+        for key, label in buttons_info:
+            btn_rect = self.buttons[key].move(ox, 0)
+            pygame.draw.rect(panel, BUTTON_COLOR, btn_rect)
+            pygame.draw.rect(panel, TEXT_COLOR, btn_rect, 2)
             
-            text = self.font_small.render(label, True, TEXT_COLOR)
-            text_rect = text.get_rect(center=btn_rect.center)
-            self.screen.blit(text, text_rect)
+            if label:
+                text = self._text(label, self.font_small, TEXT_COLOR)
+                panel.blit(text, text.get_rect(center=btn_rect.center))
+    
+    def draw_control_panel(self):
+        """Draw the control panel"""
+        # Static background, labels and control outlines
+        self.screen.blit(self._panel_bg, (CONTROL_PANEL_X, 0))
+        
+        # Highlight the active mode button
+        btn_rect = self.buttons[f'{self.current_mode}_mode']
+        pygame.draw.rect(self.screen, BUTTON_ACTIVE, btn_rect)
+        pygame.draw.rect(self.screen, TEXT_COLOR, btn_rect, 2)
+        text = self._text(self.MODE_LABELS[self.current_mode], self.font_small, TEXT_COLOR)
+        self.screen.blit(text, text.get_rect(center=btn_rect.center))
+        
+        # Current mode indicator
+        y_offset = 40
+        mode_indicator = self._text(f"Current: {self.current_mode.title()}", self.font_small, (0, 100, 0))
+        self.screen.blit(mode_indicator, (CONTROL_PANEL_X + 10, y_offset + 30))
+        
+        # Active color radio dot
+        y_offset = 100
+        dot_y = y_offset + 7 if self.active_color == chess.WHITE else y_offset + 32
+        pygame.draw.circle(self.screen, TEXT_COLOR, (CONTROL_PANEL_X + 34, dot_y), 4)
+        
+        # Castling checkmarks
+        for key, label, y_pos in self.CASTLING_OPTIONS:
+            if self.castling_rights[key]:
+                pygame.draw.line(self.screen, TEXT_COLOR,
+                               (CONTROL_PANEL_X + 23, y_pos + 7),
+                               (CONTROL_PANEL_X + 27, y_pos + 11), 2)
+                pygame.draw.line(self.screen, TEXT_COLOR,
+                               (CONTROL_PANEL_X + 27, y_pos + 11),
+                               (CONTROL_PANEL_X + 32, y_pos + 4), 2)
+        
+        # VS AI toggle label
+        btn_rect = self.buttons['toggle_vs_ai']
+        text = self._text('VS AI: ' + ('ON' if self.play_vs_ai else 'OFF'), self.font_small, TEXT_COLOR)
+        self.screen.blit(text, text.get_rect(center=btn_rect.center))
         
         # AI status and move evaluation
         y_offset = 340
-        if self.ai_thinking:
-            ai_text = self.font_small.render("AI thinking...", True, (255, 0, 0))
+        if not self._engine_ready.is_set():
+            loading_text = self._text("Engine loading...", self.font_small, (120, 120, 120))
+            self.screen.blit(loading_text, (CONTROL_PANEL_X + 10, y_offset))
+        elif self.ai_thinking:
+            ai_text = self._text("AI thinking...", self.font_small, (255, 0, 0))
             self.screen.blit(ai_text, (CONTROL_PANEL_X + 10, y_offset))
         elif self.last_ai_move:
             # Display AI move with centipawn evaluation
-            ai_text = self.font_small.render(f"AI Move: {self.last_ai_move}", True, (0, 0, 200))
+            ai_text = self._text(f"AI Move: {self.last_ai_move}", self.font_small, (0, 0, 200))
             self.screen.blit(ai_text, (CONTROL_PANEL_X + 10, y_offset))
             
             if self.last_ai_eval is not None:
                 # Convert evaluation to centipawns for display
                 centipawns = int(self.last_ai_eval * 100)
-                eval_text = self.font_small.render(f"Eval: {centipawns} cp ({self.last_ai_eval:.2f})", True, (0, 0, 200))
+                eval_text = self._text(f"Eval: {centipawns} cp ({self.last_ai_eval:.2f})", self.font_small, (0, 0, 200))
                 self.screen.blit(eval_text, (CONTROL_PANEL_X + 10, y_offset + 15))
         
         # Stockfish comparison with detailed centipawn values
         if self.stockfish_comparison:
             y_offset += 50
-            comp_text = self.font_small.render("Stockfish Analysis:", True, TEXT_COLOR)
+            comp_text = self._text("Stockfish Analysis:", self.font_small, TEXT_COLOR)
             self.screen.blit(comp_text, (CONTROL_PANEL_X + 10, y_offset))
             
             # Show user move ranking if available
             if self.stockfish_comparison.get('user_rank'):
-                rank_text = self.font_small.render(f"Your move ranks #{self.stockfish_comparison['user_rank']}", True, (0, 150, 0))
+                rank_text = self._text(f"Your move ranks #{self.stockfish_comparison['user_rank']}", self.font_small, (0, 150, 0))
                 self.screen.blit(rank_text, (CONTROL_PANEL_X + 10, y_offset + 15))
                 y_offset += 15
             
@@ -420,9 +466,26 @@ class ChessPredictor:
                 elif i == 0:
                     color = (100, 100, 255)  # Light blue for best move
                 
-                text = self.font_small.render(move_text, True, color)
+                text = self._text(move_text, self.font_small, color)
                 self.screen.blit(text, (CONTROL_PANEL_X + 10, y_pos))
     
+    def mark_dirty(self, rect=None):
+        """Request a redraw, optionally limiting the display update to rect"""
+        with self._dirty_lock:
+            if rect is not None and (not self._dirty or self._dirty_rects is not None):
+                self._dirty_rects = (self._dirty_rects or []) + [rect]
+            else:
+                self._dirty_rects = None
+            self._dirty = True
+    
+    def _take_dirty(self):
+        """Return and clear the pending (dirty, rects) redraw request"""
+        with self._dirty_lock:
+            dirty, rects = self._dirty, self._dirty_rects
+            self._dirty = False
+            self._dirty_rects = None
+        return dirty, rects
+    
     def get_square_from_pos(self, pos):
         """Convert mouse position to chess square (accounting for board offset)"""
         x, y = pos
@@ -447,51 +510,177 @@ class ChessPredictor:
                 return False
             return True
         else:
-            # In play/analysis mode, only allow legal moves
-            try:
-                move = chess.Move(from_square, to_square)
-                return move in self.board.legal_moves
-            except:
-                return False
+            # In play/analysis mode, only allow legal moves (collected on mouse down)
+            return to_square in self.valid_moves
+    
+    def legal_move_set(self):
+        """Return the legal moves of the current position, cached per position"""
+        key = self.board._transposition_key()
+        if key != self._legal_key:
+            self._legal_moves = frozenset(self.board.legal_moves)
+            self._moves_by_from = {}
+            for move in self._legal_moves:
+                self._moves_by_from.setdefault(move.from_square, set()).add(move.to_square)
+            self._legal_key = key
+        return self._legal_moves
+    
+    def legal_targets(self, square):
+        """Return a new set of squares the piece on square can legally move to"""
+        self.legal_move_set()
+        return set(self._moves_by_from.get(square, ()))
+    
+    def _move_setup_piece(self, from_square, to_square):
+        """Relocate a piece in setup mode by editing the board's bitboards directly"""
+        board = self.board
+        piece_type = board.piece_type_at(from_square)
+        if piece_type is None:
+            return
+        mask_from = chess.BB_SQUARES[from_square]
+        mask_to = chess.BB_SQUARES[to_square]
+        color = bool(board.occupied_co[chess.WHITE] & mask_from)
+        
+        # Clear both squares, replacing whatever stood on the target
+        keep = ~(mask_from | mask_to)
+        board.pawns &= keep
+        board.knights &= keep
+        board.bishops &= keep
+        board.rooks &= keep
+        board.queens &= keep
+        board.kings &= keep
+        board.promoted &= keep
+        board.occupied &= keep
+        board.occupied_co[chess.WHITE] &= keep
+        board.occupied_co[chess.BLACK] &= keep
+        
+        attr = self.PIECE_BITBOARDS[piece_type]
+        setattr(board, attr, getattr(board, attr) | mask_to)
+        board.occupied |= mask_to
+        board.occupied_co[color] |= mask_to
+        board.clear_stack()
     
     def make_move(self, move):
         """Make a move and update game state"""
-        if move in self.board.legal_moves:
+        if move in self.legal_move_set():
+            # The comparison analyses the position before the move
+            engine = self.engine
+            if engine:
+                pre_fen, pre_key = self.board.fen(), self._legal_key
             self.move_history.append(move)
-            self.position_history.append(self.board.fen())
             self.board.push(move)
+            self._legal_key = None
             
             # Get Stockfish comparison for the move
-            if self.stockfish_ai:
-                self.get_stockfish_comparison(str(move))
+            if engine:
+                self.get_stockfish_comparison(str(move), pre_fen, pre_key)
             
             return True
         return False
     
+    def _init_engine(self, stockfish_path):
+        """Start the engine and its worker thread off the UI thread"""
+        engine = None
+        try:
+            print("   - Starting Stockfish UCI engine...")
+            engine = chess.engine.SimpleEngine.popen_uci(stockfish_path or "stockfish.exe")
+            engine.configure({"Skill Level": 15})
+            self.engine = engine
+            threading.Thread(target=self._engine_worker, daemon=True).start()
+            print("   - ✅ Stockfish ready")
+        except Exception as e:
+            print(f"   - ✗ Stockfish failed: {e}")
+            if engine:
+                engine.quit()
+            self.engine = None
+        finally:
+            self._engine_ready.set()
+            self.mark_dirty(self._panel_rect)
+    
+    def _cached_analysis(self, key):
+        """Return cached top moves for a transposition key, or None on a miss"""
+        with self._analysis_lock:
+            top_moves = self._analysis_cache.get(key)
+            if top_moves is not None:
+                self._analysis_cache.move_to_end(key)
+        return top_moves
+    
+    def _store_analysis(self, key, top_moves):
+        """Insert top moves into the LRU analysis cache"""
+        with self._analysis_lock:
+            self._analysis_cache[key] = top_moves
+            if len(self._analysis_cache) > self.ANALYSIS_CACHE_SIZE:
+                self._analysis_cache.popitem(last=False)
+    
+    def _engine_worker(self):
+        """Run queued (fen, callback, ai_request_id) analysis jobs on the shared engine"""
+        while True:
+            job = self._engine_q.get()
+            if job is None:
+                break
+            fen, callback, ai_request_id = job
+            # Superseded AI requests never reach the engine
+            if ai_request_id is not None and ai_request_id != self._ai_request_id:
+                continue
+            board = chess.Board(fen)
+            key = board._transposition_key()
+            top_moves = self._cached_analysis(key)
+            if top_moves is not None:
+                callback(top_moves)
+                continue
+            try:
+                with self._engine_lock:
+                    infos = self.engine.analyse(
+                        board,
+                        chess.engine.Limit(depth=self.ENGINE_DEPTH),
+                        multipv=self.ENGINE_MULTIPV
+                    )
+                top_moves = [
+                    {
+                        'move': info['pv'][0].uci(),
+                        'centipawn': info['score'].white().score(),
+                        'mate': info['score'].white().mate()
+                    }
+                    for info in infos if info.get('pv')
+                ]
+                self._store_analysis(key, top_moves)
+            except Exception as e:
+                print(f"Engine error: {e}")
+                top_moves = None
+            callback(top_moves)
+    
+    def close_engine(self):
+        """Drop pending engine jobs, stop the worker and quit the engine"""
+        try:
+            while True:
+                self._engine_q.get_nowait()
+        except queue.Empty:
+            pass
+        self._engine_q.put(None)
+        # Wait for an in-flight search so quit never interleaves with it
+        with self._engine_lock:
+            self.engine.quit()
+    
     def get_ai_move(self):
-        """Get AI move in background thread using notebook approach"""
-        if not self.stockfish_ai:
+        """Queue an AI move request for the engine worker"""
+        if not self.engine:
             print("❌ Stockfish AI not available!")
-            print("Install with: pip install stockfish")
+            print("Place the Stockfish binary as stockfish.exe or pass stockfish_path")
             # Show message in GUI
             self.last_ai_move = "No AI available"
             self.last_ai_eval = None
             return
             
-        if self.ai_thinking:
-            print("AI is already thinking... canceling previous request")
-            self.ai_thinking = False  # Cancel previous request
-            time.sleep(0.1)  # Brief pause
+        # A newer request supersedes any pending one
+        self._ai_request_id += 1
+        request_id = self._ai_request_id
         
-        def ai_worker():
-            self.ai_thinking = True
+        def on_analysis(top_moves):
+            if request_id != self._ai_request_id:
+                return
             try:
-                # Use notebook approach with faster depth
-                self.stockfish_ai.set_depth(8)  # Faster calculation
-                self.stockfish_ai.set_fen_position(self.board.fen())
-                
-                # Get top moves (aim for 10th best as specified)
-                top_moves = self.stockfish_ai.get_top_moves(12)
+                if top_moves is None:
+                    self.last_ai_move = "AI Error"
+                    self.last_ai_eval = None
+                    return
                 
                 if not top_moves:
                     print("No moves returned from Stockfish")
@@ -503,8 +692,8 @@ class ChessPredictor:
                 move_index = min(9, len(top_moves) - 1)  # 10th best (0-indexed) or last available
                 selected_move = top_moves[move_index]
                 
-                move_uci = selected_move['Move']
-                centipawns = selected_move['Centipawn'] if selected_move['Centipawn'] else 0
+                move_uci = selected_move['move']
+                centipawns = selected_move['centipawn'] if selected_move['centipawn'] else 0
                 eval_pawns = centipawns / 100.0
                 
                 self.last_ai_move = move_uci
@@ -521,12 +710,9 @@ class ChessPredictor:
                 print(f"AI suggests: {move_uci} (rank {move_index + 1}, eval: {eval_pawns:.2f})")
                 
                 if self.current_mode == PLAY_MODE and self.play_vs_ai:
-                    # Make the AI move
+                    # The main loop plays the move so the board is only mutated there
                     try:
-                        ai_move = chess.Move.from_uci(move_uci)
-                        if ai_move in self.board.legal_moves:
-                            self.make_move(ai_move)
-                            print(f"AI played: {move_uci}")
+                        self._pending_ai_move = (key, chess.Move.from_uci(move_uci))
                     except Exception as e:
                         print(f"Error making AI move: {e}")
                 
@@ -536,50 +722,60 @@ class ChessPredictor:
                 self.last_ai_eval = None
             finally:
                 self.ai_thinking = False
+                self.mark_dirty()
         
-        threading.Thread(target=ai_worker, daemon=True).start()
+        key = self.board._transposition_key()
+        self.ai_thinking = True
+        self.mark_dirty(self._panel_rect)
+        self._engine_q.put((self.board.fen(), on_analysis, request_id))
     
-    def get_stockfish_comparison(self, user_move):
-        """Get Stockfish comparison for a move using notebook approach"""
-        if not self.stockfish_ai:
+    def cancel_ai_move(self):
+        """Discard the result of any pending AI move request"""
+        self._ai_request_id += 1
+        self.ai_thinking = False
+        self._pending_ai_move = None
+    
+    def _play_pending_ai_move(self):
+        """Play a finished AI move if the board is still in the analysed position"""
+        pending, self._pending_ai_move = self._pending_ai_move, None
+        if pending is None:
+            return
+        key, ai_move = pending
+        if key == self.board._transposition_key() and ai_move in self.legal_move_set():
+            self.make_move(ai_move)
+            print(f"AI played: {ai_move.uci()}")
+            self.mark_dirty()
+    
+    def get_stockfish_comparison(self, user_move, pre_fen, pre_key):
+        """Queue a Stockfish comparison of user_move against the pre-move position"""
+        if not self.engine:
             return
         
-        def comparison_worker():
-            try:
-                # Create a copy of the board before the move
-                temp_board = self.board.copy()
-                temp_board.pop()  # Undo the last move
-                
-                # Set position and get top moves
-                self.stockfish_ai.set_fen_position(temp_board.fen())
-                top_moves = self.stockfish_ai.get_top_moves(5)
-                
-                # Find user move ranking
-                user_rank = None
-                for i, move_data in enumerate(top_moves):
-                    if move_data['Move'] == user_move:
-                        user_rank = i + 1
-                        break
-                
-                # Convert to our format
-                formatted_moves = []
-                for move_data in top_moves:
-                    formatted_moves.append({
-                        'move': move_data['Move'],
-                        'centipawn': move_data['Centipawn'],
-                        'mate': None  # stockfish library doesn't provide mate info in top_moves
-                    })
-                
-                self.stockfish_comparison = {
-                    'user_rank': user_rank,
-                    'top_moves': formatted_moves,
-                    'user_move': user_move
-                }
-                
-            except Exception as e:
-                print(f"Stockfish comparison error: {e}")
+        def on_analysis(top_moves):
+            if top_moves is None:
+                return
+            top_moves = top_moves[:5]
+            
+            # Find user move ranking
+            user_rank = None
+            for i, move_data in enumerate(top_moves):
+                if move_data['move'] == user_move:
+                    user_rank = i + 1
+                    break
+            
+            self.stockfish_comparison = {
+                'user_rank': user_rank,
+                'top_moves': top_moves,
+                'user_move': user_move
+            }
+            self.mark_dirty(self._panel_rect)
         
-        threading.Thread(target=comparison_worker, daemon=True).start()
+        # Previously analysed positions skip the engine queue entirely
+        top_moves = self._cached_analysis(pre_key)
+        if top_moves is not None:
+            on_analysis(top_moves)
+        else:
+            self._engine_q.put((pre_fen, on_analysis, None))
     
     def handle_button_click(self, pos):
         """Handle clicks on control panel buttons"""
@@ -589,6 +785,7 @@ class ChessPredictor:
                     mode = button_name.replace('_mode', '')
                     self.current_mode = mode
                     self.valid_moves.clear()
+                    self.cancel_ai_move()
                 
                 elif button_name == 'white_to_move':
                     self.active_color = chess.WHITE
@@ -604,19 +801,22 @@ class ChessPredictor:
                 elif button_name == 'clear_board':
                     self.board = chess.Board(fen=None)  # Empty board
                     self.move_history.clear()
-                    self.position_history.clear()
                     self.stockfish_comparison = None
                     self.last_ai_move = None
+                    self.cancel_ai_move()
                     print("Board cleared")
                 
                 elif button_name == 'reset_position':
                     self.board = chess.Board()  # Starting position
                     self.move_history.clear()
-                    self.position_history.clear()
                     self.stockfish_comparison = None
                     self.last_ai_move = None
+                    self.cancel_ai_move()
                     print("Position reset to starting position")
                 
+                elif not self._engine_ready.is_set() and button_name in ('get_best_move', 'toggle_vs_ai'):
+                    print("Engine still loading...")
+                
                 elif button_name == 'get_best_move':
                     print("Getting AI move recommendation...")
                     self.get_ai_move()
@@ -625,6 +825,7 @@ class ChessPredictor:
                     self.play_vs_ai = not self.play_vs_ai
                     print(f"VS AI mode: {'ON' if self.play_vs_ai else 'OFF'}")
                 
+                self.mark_dirty()
                 return True
         return False
     
@@ -634,10 +835,25 @@ class ChessPredictor:
         running = True
         
         while running:
-            for event in pygame.event.get():
+            if self.ai_thinking:
+                # Keep polling so the AI result shows up promptly
+                events = pygame.event.get()
+                clock.tick(30)
+            else:
+                # Sleep until input arrives; the timeout picks up worker updates
+                events = [pygame.event.wait(timeout=100)] + pygame.event.get()
+            
+            for event in events:
                 if event.type == pygame.QUIT:
                     running = False
                 
+                elif event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+                    self.mark_dirty()
+                
+                elif event.type == pygame.MOUSEMOTION:
+                    if self.dragging:
+                        self.mark_dirty()
+                
                 elif event.type == pygame.MOUSEBUTTONDOWN:
                     if event.button == 1:  # Left click
                         # Check if click is on control panel
@@ -660,15 +876,12 @@ class ChessPredictor:
                                     # In play/analysis mode, only select pieces of current player
                                     self.selected_piece = square
                                     self.dragging = True
-                                    self.valid_moves = {
-                                        move.to_square 
-                                        for move in self.board.legal_moves 
-                                        if move.from_square == square
-                                    }
+                                    self.valid_moves = self.legal_targets(square)
                                 else:
                                     # Clear selection if invalid piece clicked
                                     self.selected_piece = None
                                     self.valid_moves.clear()
+                                self.mark_dirty()
                 
                 elif event.type == pygame.MOUSEBUTTONUP:
                     if event.button == 1 and self.dragging:
@@ -677,12 +890,13 @@ class ChessPredictor:
                             if self.is_valid_move(self.selected_piece, target_square):
                                 if self.current_mode == SETUP_MODE:
                                     # In setup mode, just move pieces
-                                    piece = self.board.remove_piece_at(self.selected_piece)
-                                    self.board.remove_piece_at(target_square)
-                                    self.board.set_piece_at(target_square, piece)
+                                    self._move_setup_piece(self.selected_piece, target_square)
                                 else:
                                     # In play/analysis mode, make legal moves
                                     move = chess.Move(self.selected_piece, target_square)
+                                    if move not in self.legal_move_set():
+                                        # Only promotions need a piece; default to a queen
+                                        move = chess.Move(self.selected_piece, target_square, chess.QUEEN)
                                     if self.make_move(move):
                                         # If playing vs AI and it's AI's turn
                                         if (self.current_mode == PLAY_MODE and 
@@ -693,6 +907,13 @@ class ChessPredictor:
                         self.dragging = False
                         self.selected_piece = None
                         self.valid_moves.clear()
+                        self.mark_dirty()
+            
+            self._play_pending_ai_move()
+            
+            dirty, dirty_rects = self._take_dirty()
+            if not dirty:
+                continue
             
             # Draw everything
             self.screen.fill((255, 255, 255))
@@ -704,20 +925,20 @@ class ChessPredictor:
             if self.dragging:
                 piece = self.board.piece_at(self.selected_piece)
                 if piece:
-                    color = 'w' if piece.color else 'b'
-                    piece_key = f"{color}{piece.symbol().upper()}"
+                    surf = self._piece_surf[piece.piece_type + 6 * piece.color]
                     x, y = pygame.mouse.get_pos()
                     x -= PIECE_SIZE // 2
                     y -= PIECE_SIZE // 2
-                    self.screen.blit(self.pieces[piece_key], (x, y))
+                    self.screen.blit(surf, (x, y))
             
-            pygame.display.flip()
-            clock.tick(60)
+            if dirty_rects is None:
+                pygame.display.flip()
+            else:
+                pygame.display.update(dirty_rects)
         
         # Cleanup
-        if self.stockfish_ai:
-            # Stockfish library handles cleanup automatically
-            pass
+        if self.engine:
+            self.close_engine()
         pygame.quit()
 
 if __name__ == "__main__":
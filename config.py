@@ -31,6 +31,12 @@ PIECE_SCALE = 0.8     # Smaller pieces for better fit
 PIECE_SIZE = int(SQUARE_SIZE * PIECE_SCALE)
 PIECE_OFFSET = (SQUARE_SIZE - PIECE_SIZE) // 2  # For centering (now unused but kept for compatibility)
 
+# Per-square pixel coordinates on an unoffset board, indexed by square (a1=0 .. h8=63)
+SQ_PIECE_XY = tuple(((s & 7) * SQUARE_SIZE + PIECE_OFFSET, (7 - (s >> 3)) * SQUARE_SIZE + PIECE_OFFSET)
+                    for s in range(64))
+SQ_CENTER_XY = tuple(((s & 7) * SQUARE_SIZE + SQUARE_SIZE // 2, (7 - (s >> 3)) * SQUARE_SIZE + SQUARE_SIZE // 2)
+                     for s in range(64))
+
 # Colors
 LIGHT_SQUARE = (240, 217, 181)    # Light brown
 DARK_SQUARE = (181, 136, 99)      # Dark brown
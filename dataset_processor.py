@@ -1,19 +1,70 @@
 import chess.pgn
+from chess import popcount
 import json
 import csv
+import io
+import mmap
+import os
+import shutil
+from multiprocessing import Pool, Value, cpu_count
+from operator import itemgetter
 from pathlib import Path
-from typing import List, Dict, Generator, Optional
+from typing import List, Dict, Generator, Optional, Tuple
 import time
 
+def _fast_int(s: str, default: int = 0) -> int:
+    """Parse a plain digit string, returning default for anything else (e.g. '?')"""
+    return int(s) if s.isdecimal() else default
+
+# Upper bound on the bytes of PGN a single worker job decodes
+PGN_CHUNK_BYTES = 64 * 1024 * 1024
+
+class FilteredGameBuilder(chess.pgn.GameBuilder):
+    """GameBuilder that skips the movetext of games rejected by headers_pass"""
+    
+    def __init__(self, headers_pass):
+        super().__init__()
+        self.headers_pass = headers_pass
+    
+    def end_headers(self):
+        if not self.headers_pass(self.game.headers):
+            return chess.pgn.SKIP
+
+class _ByteRange(io.RawIOBase):
+    """Read-only raw stream over bytes [start, end) of a file, read on demand"""
+    
+    def __init__(self, path, start: int, end: int):
+        super().__init__()
+        self._file = open(path, 'rb', buffering=0)
+        self._file.seek(start)
+        self._remaining = end - start
+    
+    def readable(self):
+        return True
+    
+    def readinto(self, b):
+        if self._remaining <= 0:
+            return 0
+        n = self._file.readinto(memoryview(b)[:self._remaining])
+        self._remaining -= n
+        return n
+    
+    def close(self):
+        if not self.closed:
+            self._file.close()
+        super().close()
+
 class DatasetProcessor:
-    def __init__(self, dataset_path: str):
+    def __init__(self, dataset_path: str, record_san: bool = False):
         """
         Initialize dataset processor for Lichess Elite Database
         
         Args:
             dataset_path: Path to directory containing PGN files
+            record_san: Also record each move in SAN (costs a legal move generation per position)
         """
         self.dataset_path = Path(dataset_path)
+        self.record_san = record_san
         self.processed_games = 0
         self.processed_positions = 0
     
@@ -27,7 +78,25 @@ class DatasetProcessor:
             pgn_files.extend(self.dataset_path.glob('*.pgn'))
             pgn_files.extend(self.dataset_path.glob('**/*.pgn'))
         
-        return sorted(pgn_files)
+        # '**' also matches the top directory, so both globs can list a file
+        return sorted(set(pgn_files))
+    
+    def _headers_pass(self, headers: chess.pgn.Headers) -> bool:
+        """
+        Check the Elo and time control filters using only a game's headers
+        """
+        get = headers.get
+        
+        # Only process games with both players > 2400 Elo
+        if _fast_int(get('WhiteElo', '')) < 2400 or _fast_int(get('BlackElo', '')) < 2400:
+            return False
+        
+        # Skip bullet/blitz games (focus on classical)
+        base_time, plus, _ = get('TimeControl', '').partition('+')
+        if plus and (not base_time.isdecimal() or int(base_time) < 600):  # Less than 10 minutes
+            return False
+        
+        return True
     
     def parse_game(self, game: chess.pgn.Game) -> Optional[Dict]:
         """
@@ -39,35 +108,22 @@ class DatasetProcessor:
         headers = game.headers
         
         # Filter for high-quality games
-        try:
-            white_elo = int(headers.get('WhiteElo', 0))
-            black_elo = int(headers.get('BlackElo', 0))
-            
-            # Only process games with both players > 2400 Elo
-            if white_elo < 2400 or black_elo < 2400:
-                return None
-            
-            # Skip bullet/blitz games (focus on classical)
-            time_control = headers.get('TimeControl', '')
-            if '+' in time_control:
-                base_time = int(time_control.split('+')[0])
-                if base_time < 600:  # Less than 10 minutes
-                    return None
-            
-            return {
-                'white': headers.get('White', 'Unknown'),
-                'black': headers.get('Black', 'Unknown'),
-                'white_elo': white_elo,
-                'black_elo': black_elo,
-                'result': headers.get('Result', '*'),
-                'date': headers.get('Date', ''),
-                'event': headers.get('Event', ''),
-                'time_control': time_control,
-                'opening': headers.get('Opening', ''),
-                'eco': headers.get('ECO', '')
-            }
-        except (ValueError, TypeError):
+        if not self._headers_pass(headers):
             return None
+        
+        get = headers.get
+        return {
+            'white': get('White', 'Unknown'),
+            'black': get('Black', 'Unknown'),
+            'white_elo': _fast_int(get('WhiteElo', '')),
+            'black_elo': _fast_int(get('BlackElo', '')),
+            'result': get('Result', '*'),
+            'date': get('Date', ''),
+            'event': get('Event', ''),
+            'time_control': get('TimeControl', ''),
+            'opening': get('Opening', ''),
+            'eco': get('ECO', '')
+        }
     
     def extract_positions(self, game: chess.pgn.Game) -> Generator[Dict, None, None]:
         """
@@ -88,59 +144,138 @@ class DatasetProcessor:
                 continue
             
             # Skip endgame positions (less than 10 pieces)
-            if len(board.piece_map()) < 10:
+            if popcount(board.occupied) < 10:
                 board.push(move)
                 continue
             
             # Record position before move
             position_data = {
-                'fen': board.fen(),
+                'fen': self._fen(board),
                 'move': move.uci(),
-                'move_san': board.san(move),
                 'move_number': move_number,
                 'to_move': 'white' if board.turn else 'black',
                 'evaluation': self._evaluate_position(board),
-                'piece_count': len(board.piece_map())
+                'piece_count': popcount(board.occupied)
             }
-            
-            board.push(move)
+            if self.record_san:
+                # Formats SAN and pushes in one step; board.san() would push and pop first
+                position_data['move_san'] = board._algebraic_and_push(move)
+            else:
+                board.push(move)
             yield position_data
     
+    def _fen(self, board: chess.Board) -> str:
+        """
+        FEN built from raw board fields, skipping the en passant legality check
+        """
+        ep = '-' if board.ep_square is None else chess.SQUARE_NAMES[board.ep_square]
+        return (f"{board.board_fen()} {'w' if board.turn else 'b'} {board.castling_xfen()} "
+                f"{ep} {board.halfmove_clock} {board.fullmove_number}")
+    
     def _evaluate_position(self, board: chess.Board) -> float:
         """
         Simple material evaluation in centipawns
         """
-        piece_values = {
-            chess.PAWN: 100,
-            chess.KNIGHT: 320,
-            chess.BISHOP: 330,
-            chess.ROOK: 500,
-            chess.QUEEN: 900,
-            chess.KING: 0
-        }
-        
-        white_material = 0
-        black_material = 0
+        w = board.occupied_co[chess.WHITE]
+        b = board.occupied_co[chess.BLACK]
         
-        for square in chess.SQUARES:
-            piece = board.piece_at(square)
-            if piece:
-                value = piece_values[piece.piece_type]
-                if piece.color == chess.WHITE:
-                    white_material += value
-                else:
-                    black_material += value
+        white_material = (100 * popcount(board.pawns & w) + 320 * popcount(board.knights & w) +
+                          330 * popcount(board.bishops & w) + 500 * popcount(board.rooks & w) +
+                          900 * popcount(board.queens & w))
+        black_material = (100 * popcount(board.pawns & b) + 320 * popcount(board.knights & b) +
+                          330 * popcount(board.bishops & b) + 500 * popcount(board.rooks & b) +
+                          900 * popcount(board.queens & b))
         
         # Return from white's perspective
         return (white_material - black_material) / 100.0
     
-    def process_files(self, max_games: int = 1000, output_file: str = None) -> Dict:
+    def _fieldnames(self) -> List[str]:
+        """CSV columns for position rows"""
+        fieldnames = ['fen', 'move', 'move_number', 'to_move', 'evaluation', 'piece_count']
+        if self.record_san:
+            fieldnames.insert(2, 'move_san')
+        return fieldnames
+    
+    def _process_pgn(self, pgn_file: Path, span: Tuple[int, int], games_left,
+                     shard_file: Optional[str]) -> Dict:
+        """
+        Process a byte range of a PGN file, writing its positions to a headerless CSV shard
+        
+        Each accepted game is claimed from games_left, a game budget shared by
+        every job, and the range is abandoned once that budget runs out.
+        
+        Returns:
+            Dict with per-chunk counts
+        """
+        processed_games = 0
+        skipped_games = 0
+        total_positions = 0
+        start_time = time.time()
+        
+        csv_writer = None
+        csv_file = None
+        if shard_file:
+            csv_file = open(shard_file, 'w', newline='', encoding='utf-8')
+            csv_writer = csv.writer(csv_file)
+            # Rows are written positionally in header order
+            row_getter = itemgetter(*self._fieldnames())
+        
+        start, end = span
+        label = f"{pgn_file.name}[{start}:{end}]"
+        print(f"Processing {label}...")
+        try:
+            # Read lazily so a job that fills its game budget stops reading early
+            with io.TextIOWrapper(io.BufferedReader(_ByteRange(pgn_file, start, end)), encoding='utf-8') as f:
+                while games_left.value > 0:
+                    # Games failing the header filter come back with no moves parsed
+                    game = chess.pgn.read_game(f, Visitor=lambda: FilteredGameBuilder(self._headers_pass))
+                    if game is None:
+                        break
+                    
+                    game_info = self.parse_game(game)
+                    if game_info is None:
+                        skipped_games += 1
+                        continue
+                    if not _claim_game(games_left):
+                        break
+                    
+                    # Extract positions from this game
+                    game_positions = list(self.extract_positions(game))
+                    total_positions += len(game_positions)
+                    
+                    # Write to CSV if specified
+                    if csv_writer:
+                        csv_writer.writerows(map(row_getter, game_positions))
+                    
+                    processed_games += 1
+                    
+                    if processed_games % 100 == 0:
+                        elapsed = time.time() - start_time
+                        print(f"{label}: {processed_games} games, {total_positions} positions in {elapsed:.1f}s")
+        finally:
+            if csv_file:
+                csv_file.close()
+        
+        return {
+            'processed_games': processed_games,
+            'skipped_games': skipped_games,
+            'total_positions': total_positions
+        }
+    
+    def process_files(self, max_games: int = 1000, output_file: str = None,
+                      workers: Optional[int] = 1) -> Dict:
         """
-        Process PGN files and extract training data
+        Process PGN files in parallel and extract training data
+        
+        Files are cut into chunks at game boundaries so a single large file
+        is also spread across worker processes.
         
         Args:
-            max_games: Maximum number of games to process
+            max_games: Maximum number of games to process across all chunks
             output_file: Optional CSV file to save positions
+            workers: Worker process count, None for CPU count. With more than one
+                worker the calling script needs an if __name__ == "__main__" guard
+                on platforms that spawn processes (Windows)
             
         Returns:
             Dict with processing statistics
@@ -152,73 +287,64 @@ class DatasetProcessor:
         
         print(f"Found {len(pgn_files)} PGN file(s)")
         
-        all_positions = []
-        processed_games = 0
-        skipped_games = 0
         start_time = time.time()
         
-        # Setup CSV writer if output file specified
-        csv_writer = None
-        csv_file = None
-        if output_file:
-            csv_file = open(output_file, 'w', newline='', encoding='utf-8')
-            fieldnames = ['fen', 'move', 'move_san', 'move_number', 'to_move', 'evaluation', 'piece_count']
-            csv_writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
-            csv_writer.writeheader()
+        # Enough chunks to keep every worker busy, none larger than PGN_CHUNK_BYTES,
+        # but no more per file than its share of the game budget can use
+        workers = workers or cpu_count()
+        min_chunks = -(-workers // len(pgn_files))
+        max_chunks = max(1, -(-max_games // len(pgn_files)))
+        chunks = [
+            (pgn_file, span)
+            for pgn_file in pgn_files
+            for span in _pgn_chunks(pgn_file, min(max_chunks, max(min_chunks, -(-pgn_file.stat().st_size // PGN_CHUNK_BYTES))))
+        ]
         
-        try:
-            for pgn_file in pgn_files:
-                print(f"Processing {pgn_file.name}...")
-                
-                with open(pgn_file, 'r', encoding='utf-8') as f:
-                    while processed_games < max_games:
-                        game = chess.pgn.read_game(f)
-                        if game is None:
-                            break
-                        
-                        game_info = self.parse_game(game)
-                        if game_info is None:
-                            skipped_games += 1
-                            continue
-                        
-                        # Extract positions from this game
-                        game_positions = list(self.extract_positions(game))
-                        
-                        # Add to collection
-                        all_positions.extend(game_positions)
-                        
-                        # Write to CSV if specified
-                        if csv_writer:
-                            csv_writer.writerows(game_positions)
-                        
-                        processed_games += 1
-                        
-                        if processed_games % 100 == 0:
-                            elapsed = time.time() - start_time
-                            print(f"Processed {processed_games} games, {len(all_positions)} positions in {elapsed:.1f}s")
-                
-                if processed_games >= max_games:
-                    break
+        # Each chunk gets its own CSV shard; all of them draw on one game budget,
+        # so chunks that run dry leave their share to the others
+        jobs = [
+            (self, pgn_file, span, f"{output_file}.part{i}" if output_file else None)
+            for i, (pgn_file, span) in enumerate(chunks)
+        ]
+        games_left = Value('q', max_games)
         
-        finally:
-            if csv_file:
-                csv_file.close()
+        workers = min(workers, len(jobs))
+        if workers > 1:
+            with Pool(workers, initializer=_init_worker, initargs=(games_left,)) as pool:
+                results = list(pool.imap_unordered(_process_one_pgn, jobs))
+        else:
+            _init_worker(games_left)
+            results = [_process_one_pgn(job) for job in jobs]
+        
+        # Concatenate shards in file order under a single header
+        if output_file:
+            with open(output_file, 'w', newline='', encoding='utf-8') as csv_file:
+                csv.writer(csv_file).writerow(self._fieldnames())
+                for job in jobs:
+                    shard_file = job[3]
+                    with open(shard_file, 'r', newline='', encoding='utf-8') as shard:
+                        shutil.copyfileobj(shard, csv_file)
+                    os.remove(shard_file)
+        
+        processed_games = sum(r['processed_games'] for r in results)
+        skipped_games = sum(r['skipped_games'] for r in results)
+        total_positions = sum(r['total_positions'] for r in results)
         
         elapsed_time = time.time() - start_time
         
         stats = {
             'processed_games': processed_games,
             'skipped_games': skipped_games,
-            'total_positions': len(all_positions),
+            'total_positions': total_positions,
             'processing_time': elapsed_time,
-            'positions_per_second': len(all_positions) / elapsed_time if elapsed_time > 0 else 0,
+            'positions_per_second': total_positions / elapsed_time if elapsed_time > 0 else 0,
             'pgn_files_processed': len(pgn_files)
         }
         
         print(f"\nDataset processing completed:")
         print(f"- Processed: {processed_games} games")
         print(f"- Skipped: {skipped_games} games")
-        print(f"- Positions: {len(all_positions)}")
+        print(f"- Positions: {total_positions}")
         print(f"- Time: {elapsed_time:.1f}s")
         print(f"- Rate: {stats['positions_per_second']:.1f} positions/second")
         
@@ -238,6 +364,45 @@ class DatasetProcessor:
         print(f"Sample dataset saved to {output_file}")
         return stats
 
+def _pgn_chunks(pgn_file: Path, n_chunks: int) -> List[Tuple[int, int]]:
+    """
+    Split a PGN file into up to n_chunks (start, end) byte ranges that begin at an [Event tag
+    """
+    with open(pgn_file, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            bounds = [0]
+            for i in range(1, n_chunks):
+                pos = mm.find(b'\n[Event ', max(bounds[-1], size * i // n_chunks))
+                if pos < 0:
+                    break
+                bounds.append(pos + 1)
+    bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+# Game budget shared by the jobs of the current process_files call
+_games_left = None
+
+def _init_worker(games_left) -> None:
+    """Pool initializer: install the shared game budget in this process"""
+    global _games_left
+    _games_left = games_left
+
+def _claim_game(games_left) -> bool:
+    """Take one game from the shared budget, returning False once it is spent"""
+    with games_left.get_lock():
+        if games_left.value <= 0:
+            return False
+        games_left.value -= 1
+        return True
+
+def _process_one_pgn(job) -> Dict:
+    """Pool entry point: unpack a (processor, pgn_file, span, shard_file) job"""
+    processor, pgn_file, span, shard_file = job
+    return processor._process_pgn(pgn_file, span, _games_left, shard_file)
+
 # Test/demo function
 if __name__ == "__main__":
     # Example usage
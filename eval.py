@@ -1,14 +1,62 @@
 import chess
+import numpy as np
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Centipawn value indexed by piece_type (index 0 unused, kings score 0)
+_PIECE_VALUES = (0, 100, 300, 300, 500, 900, 0)
+
+if NUMBA_AVAILABLE:
+    _M1 = np.uint64(0x5555555555555555)
+    _M2 = np.uint64(0x3333333333333333)
+    _M4 = np.uint64(0x0F0F0F0F0F0F0F0F)
+    _H01 = np.uint64(0x0101010101010101)
+
+    @njit(cache=True, nogil=True, inline='always')
+    def _popcount(x):
+        # SWAR bit count on a uint64
+        x = np.uint64(x)
+        x = x - ((x >> np.uint64(1)) & _M1)
+        x = (x & _M2) + ((x >> np.uint64(2)) & _M2)
+        x = (x + (x >> np.uint64(4))) & _M4
+        return np.int64((x * _H01) >> np.uint64(56))
+
+    @njit("int64(uint64, uint64, uint64, uint64, uint64)", cache=True, nogil=True)
+    def _material(pawns, knights, bishops, rooks, queens):
+        return (100 * _popcount(pawns) + 300 * _popcount(knights) + 300 * _popcount(bishops) +
+                500 * _popcount(rooks) + 900 * _popcount(queens))
+
+# Always-replace transposition table: 64-bit position hash and score per slot (12 MB)
+_TT_SIZE = 1 << 20
+_TT_MASK = _TT_SIZE - 1
+_TT_KEYS = np.zeros(_TT_SIZE, dtype=np.uint64)
+_TT_SCORES = np.zeros(_TT_SIZE, dtype=np.int32)
+
 def evaluate_board(board):
+    # Zero marks an empty slot, so hashes are kept nonzero
+    key = hash(board._transposition_key()) & 0xFFFFFFFFFFFFFFFF or 1
+    slot = key & _TT_MASK
+    if _TT_KEYS[slot] == key:
+        return int(_TT_SCORES[slot])
+    score = _evaluate_board(board)
+    _TT_KEYS[slot] = key
+    _TT_SCORES[slot] = score
+    return score
+
+def _evaluate_board(board):
     if board.is_checkmate():
         return -9999 if board.turn == chess.WHITE else 9999
     if board.is_stalemate() or board.is_insufficient_material():
         return 0
     # Material count (centipawns)
-    material = sum(
-        len(board.pieces(piece_type, color)) * value
-        for piece_type, value in [(chess.PAWN, 100), (chess.KNIGHT, 300), (chess.BISHOP, 300),
-                                 (chess.ROOK, 500), (chess.QUEEN, 900)]
-        for color in [chess.WHITE, chess.BLACK]
-    )
-    return material if board.turn == chess.WHITE else -material
\ No newline at end of file
+    if NUMBA_AVAILABLE:
+        material = int(_material(board.pawns, board.knights, board.bishops, board.rooks, board.queens))
+        return material if board.turn == chess.WHITE else -material
+    material = 0
+    for piece_type in range(chess.PAWN, chess.KING):
+        mask = board.pieces_mask(piece_type, chess.WHITE) | board.pieces_mask(piece_type, chess.BLACK)
+        material += _PIECE_VALUES[piece_type] * chess.popcount(mask)
+    return material if board.turn == chess.WHITE else -material
@@ -22,6 +22,17 @@ class ChessGUI:
         self.dragging = False
         self.setup_mode = True
         self.valid_moves = set()
+        # Legal target squares per origin square, rebuilt after the board changes
+        self._moves_by_from = None
+        
+        # Background and checkered squares are drawn once and blitted per frame
+        self._board_bg = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT)).convert()
+        self._board_bg.fill((255, 255, 255))
+        for row in range(8):
+            for col in range(8):
+                color = LIGHT_SQUARE if (row + col) % 2 == 0 else DARK_SQUARE
+                self._board_bg.fill(
+                    color, (col * SQUARE_SIZE, row * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
         
     def load_pieces(self, use_svg):
         for color in COLORS:
@@ -29,49 +40,47 @@ class ChessGUI:
                 try:
                     path = get_piece_path(f"{color}{piece}", use_svg)
                     img = pygame.image.load(path)
+                    # Match the display pixel format so blits take the fast path
                     self.pieces[f"{color}{piece}"] = pygame.transform.smoothscale(
                         img, (PIECE_SIZE, PIECE_SIZE)
-                    )
+                    ).convert_alpha(self.screen)
                 except pygame.error as e:
                     print(f"Error loading piece {color}{piece}: {e}")
                     pygame.quit()
                     exit(1)
 
     def draw_board(self):
-        # Draw squares
-        for row in range(8):
-            for col in range(8):
-                color = LIGHT_SQUARE if (row + col) % 2 == 0 else DARK_SQUARE
-                pygame.draw.rect(
-                    self.screen, 
-                    color, 
-                    (col * SQUARE_SIZE, row * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE)
-                )
+        # Draw background and squares
+        self.screen.blit(self._board_bg, (0, 0))
         
         # Draw valid move dots
         if self.selected_piece and not self.setup_mode:
             for move in self.valid_moves:
-                center_x = (chess.square_file(move) * SQUARE_SIZE) + SQUARE_SIZE // 2
-                center_y = (7 - chess.square_rank(move)) * SQUARE_SIZE + SQUARE_SIZE // 2
+                center_x, center_y = SQ_CENTER_XY[move]
                 pygame.gfxdraw.filled_circle(
                     self.screen, center_x, center_y, 
                     SQUARE_SIZE // 6, VALID_MOVE_DOT
                 )
 
     def draw_pieces(self):
-        for square in chess.SQUARES:
+        # Visit only occupied squares
+        for square in chess.scan_forward(self.board.occupied):
+            # Don't draw the piece being dragged
+            if self.dragging and self.selected_piece == square:
+                continue
+            
             piece = self.board.piece_at(square)
-            if piece:
-                color = 'w' if piece.color else 'b'
-                piece_key = f"{color}{piece.symbol().upper()}"
-                x = chess.square_file(square) * SQUARE_SIZE + PIECE_OFFSET
-                y = (7 - chess.square_rank(square)) * SQUARE_SIZE + PIECE_OFFSET
-                
-                # Don't draw the piece being dragged
-                if self.dragging and self.selected_piece == square:
-                    continue
-                    
-                self.screen.blit(self.pieces[piece_key], (x, y))
+            color = 'w' if piece.color else 'b'
+            piece_key = f"{color}{piece.symbol().upper()}"
+            self.screen.blit(self.pieces[piece_key], SQ_PIECE_XY[square])
+
+    def legal_targets(self, square):
+        """Return a new set of squares the piece on square can legally move to"""
+        if self._moves_by_from is None:
+            self._moves_by_from = {}
+            for move in self.board.legal_moves:
+                self._moves_by_from.setdefault(move.from_square, set()).add(move.to_square)
+        return set(self._moves_by_from.get(square, ()))
 
     def get_square_from_pos(self, pos):
         x, y = pos
@@ -92,9 +101,8 @@ class ChessGUI:
                 return False
             return True
         else:
-            # In play mode, only allow legal moves
-            move = chess.Move(from_square, to_square)
-            return move in self.board.legal_moves
+            # In play mode, only allow legal moves (collected on mouse down)
+            return to_square in self.valid_moves
 
     def run(self):
         running = True
@@ -110,11 +118,7 @@ class ChessGUI:
                             self.selected_piece = square
                             self.dragging = True
                             if not self.setup_mode:
-                                self.valid_moves = {
-                                    move.to_square 
-                                    for move in self.board.legal_moves 
-                                    if move.from_square == square
-                                }
+                                self.valid_moves = self.legal_targets(square)
                 
                 elif event.type == pygame.MOUSEBUTTONUP:
                     if event.button == 1 and self.dragging:
@@ -122,9 +126,14 @@ class ChessGUI:
                         if target_square is not None:
                             if self.is_valid_move(self.selected_piece, target_square):
                                 piece = self.board.remove_piece_at(self.selected_piece)
+                                # Pawns reaching the back rank promote to a queen
+                                if (not self.setup_mode and piece.piece_type == chess.PAWN and
+                                        chess.square_rank(target_square) in (0, 7)):
+                                    piece = chess.Piece(chess.QUEEN, piece.color)
                                 # If there's a piece at target, remove it (capture/replace)
                                 self.board.remove_piece_at(target_square)
                                 self.board.set_piece_at(target_square, piece)
+                                self._moves_by_from = None
                             else:
                                 # Invalid move - piece snaps back
                                 pass
@@ -133,7 +142,6 @@ class ChessGUI:
                         self.valid_moves.clear()
 
             # Draw everything
-            self.screen.fill((255, 255, 255))
             self.draw_board()
             self.draw_pieces()
             
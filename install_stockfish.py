@@ -5,6 +5,7 @@ Manual Stockfish installer and tester
 
 import os
 import sys
+import shutil
 import subprocess
 import urllib.request
 import zipfile
@@ -29,46 +30,40 @@ def manual_stockfish_install():
         url = "https://github.com/official-stockfish/Stockfish/releases/download/sf_16/stockfish-windows-x86-64-avx2.zip"
         print(f"URL: {url}")
         
-        urllib.request.urlretrieve(url, "stockfish_download.zip")
+        with urllib.request.urlopen(url) as response, open("stockfish_download.zip", "wb") as dst:
+            shutil.copyfileobj(response, dst, length=1 << 20)
         print("✓ Download completed")
         
-        print("\n2. Extracting files...")
+        print("\n2. Looking for executable...")
+        # Extract only the stockfish executable member
         with zipfile.ZipFile("stockfish_download.zip", 'r') as zip_ref:
-            zip_ref.extractall("stockfish_extracted")
-        
-        print("\n3. Looking for executable...")
-        # Find the stockfish executable
-        extracted_dir = Path("stockfish_extracted")
-        stockfish_exe = None
-        
-        for file_path in extracted_dir.rglob("*"):
-            print(f"Found: {file_path}")
-            if (file_path.is_file() and 
-                file_path.name.lower().startswith("stockfish") and 
-                file_path.suffix.lower() == ".exe"):
-                stockfish_exe = file_path
-                print(f"✓ Found Stockfish executable: {stockfish_exe}")
-                break
+            names = zip_ref.namelist()
+            stockfish_member = next(
+                (name for name in names
+                 if Path(name).name.lower().startswith("stockfish") and
+                 name.lower().endswith(".exe")),
+                None
+            )
+            
+            if stockfish_member:
+                print(f"✓ Found Stockfish executable: {stockfish_member}")
+                
+                print("\n3. Extracting to main directory...")
+                with zip_ref.open(stockfish_member) as src, open("stockfish.exe", "wb") as dst:
+                    shutil.copyfileobj(src, dst, length=1 << 20)
+            else:
+                print("✗ Could not find stockfish executable in downloaded files")
+                print("Contents of downloaded archive:")
+                for name in names:
+                    print(f"  {name}")
+        os.remove("stockfish_download.zip")
         
-        if not stockfish_exe:
-            print("✗ Could not find stockfish executable in downloaded files")
-            print("Contents of extracted directory:")
-            for item in extracted_dir.rglob("*"):
-                print(f"  {item}")
+        if not stockfish_member:
             return None
         
-        print("\n4. Copying to main directory...")
-        import shutil
-        shutil.copy(stockfish_exe, "stockfish.exe")
-        
-        print("\n5. Testing executable...")
+        print("\n4. Testing executable...")
         if test_stockfish("stockfish.exe"):
             print("✓ Stockfish installation successful!")
-            
-            # Cleanup
-            shutil.rmtree("stockfish_extracted")
-            os.remove("stockfish_download.zip")
-            
             return "stockfish.exe"
         else:
             print("✗ Stockfish test failed")